@@ -1,358 +1,28 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 
-PHASES = ["SD", "DD", "CD", "Bidding", "CA"]
-
-# =========================================================
-# Helpers
-# =========================================================
-def money(x: float) -> str:
-    return f"${x:,.0f}"
-
-def pct(x: float) -> str:
-    return f"{x*100:,.2f}%"
-
-def normalize_pct_dict(d: dict) -> dict:
-    vals = {k: max(float(d.get(k, 0.0)), 0.0) for k in d.keys()}
-    total = sum(vals.values())
-    if total <= 0:
-        n = len(vals)
-        return {k: 1.0 / n for k in vals}
-    return {k: v / total for k, v in vals.items()}
-
-def total_pct_badge(total_pct: float, label: str = "Total %") -> str:
-    ok = abs(float(total_pct) - 100.0) < 0.01
-    bg = "#16a34a" if ok else "#dc2626"  # green / red
-    return f"""
-    <div style="
-        padding:10px 12px;
-        border-radius:10px;
-        color:white;
-        font-weight:700;
-        display:inline-block;
-        background:{bg};
-        min-width:140px;
-        text-align:center;">
-        {label}: {total_pct:,.1f}%
-    </div>
-    """
-
-def build_plan_from_library(task_df: pd.DataFrame, target_fee: float, billing_rate: float, phase_split_pct: dict) -> pd.DataFrame:
-    phase_frac = normalize_pct_dict(phase_split_pct)
-
-    df = task_df.copy()
-    if "Enabled" not in df.columns:
-        df["Enabled"] = True
-    df["Enabled"] = df["Enabled"].astype(bool)
-    df = df[df["Enabled"]].copy()
-
-    if df.empty:
-        return pd.DataFrame([{"Phase": "SD", "Task": "No tasks enabled", "Hours": 0.0, "Fee ($)": 0.0}])
-
-    df["BaseHours"] = pd.to_numeric(df.get("BaseHours", 0.0), errors="coerce").fillna(0.0)
-
-    out_rows = []
-    for ph in PHASES:
-        frac = phase_frac.get(ph, 0.0)
-        phase_fee = float(target_fee) * float(frac)
-        phase_hours = (phase_fee / billing_rate) if billing_rate > 0 else 0.0
-
-        p = df[df.get("Phase", "") == ph].copy()
-        if p.empty:
-            continue
-
-        w_sum = float(p["BaseHours"].sum())
-        p["Hours"] = (p["BaseHours"] / w_sum) * phase_hours if w_sum > 0 else 0.0
-        p["Fee ($)"] = p["Hours"] * billing_rate
-        out_rows.append(p[[ "Phase", "Task", "Hours", "Fee ($)" ]])
-
-    if not out_rows:
-        return pd.DataFrame([{"Phase": "SD", "Task": "No tasks enabled", "Hours": 0.0, "Fee ($)": 0.0}])
-
-    out = pd.concat(out_rows, ignore_index=True)
-    out["Hours"] = out["Hours"].round(1)
-    out["Fee ($)"] = out["Fee ($)"].round(0)
-    return out
-
-# =========================================================
-# Area $/SF Lookup
-# =========================================================
-RATE_LOOKUP = {
-    "Office (Fitout / Renovation)": 1.50,
-    "Office (Core & Shell)": 0.95,
-    "Lobby / Reception": 1.50,
-    "Conference Rooms": 1.50,
-    "Ballrooms": 1.75,
-    "Hotel Rooms": 1.50,
-    "Retail (dry non-cooking)": 0.85,
-    "Retail (Core & Shell Restaurant)": 0.95,
-    "Restaurant (Kitchen / Dining Areas)": 2.75,
-    "Parking (Open)": 0.35,
-    "Parking (Enclosed)": 0.45,
-    "Multifamily (Garden Style)": 0.85,
-    "Multifamily (High Rise)": 1.01,
-    "BOH Rooms": 0.75,
-    "Classroom": 1.50,
-    "Bar / Lounge Areas": 1.25,
-    "Amenity Areas": 1.25,
-    "Manufacturing Light (Mainly Storage)": 0.95,
-    "Manufacturing Complex (Process Equipment Etc.)": 1.50,
-    "Site Lighting": None,
-    "Site Parking": None,
-}
-SPACE_TYPES = list(RATE_LOOKUP.keys())
-
-def new_space_row(space_type=None, name="", area=0):
-    if space_type is None:
-        space_type = SPACE_TYPES[0]
-    return {
-        "Delete?": False,
-        "Override $/SF?": False,
-        "Space Name": name,
-        "Space Type": space_type,
-        "Area (SF)": int(area),
-        "Override $/SF Value": 0.0,
-        "$/SF": 0.0,
-        "Total Cost": 0.0,
-        "Notes": "",
-    }
-
-def build_default_area_df():
-    examples = [
-        ("Amenity Areas", "Amenities", 18000),
-        ("BOH Rooms", "Back of House", 14000),
-        ("Retail (Core & Shell Restaurant)", "Retail", 5000),
-        ("Office (Core & Shell)", "Office", 4500),
-        ("Parking (Enclosed)", "Parking", 80000),
-        ("Multifamily (High Rise)", "Residential", 175000),
-        ("Restaurant (Kitchen / Dining Areas)", "Restaurant", 3000),
-        ("Site Lighting", "Site Lighting (override)", 0),
-    ]
-    return pd.DataFrame([new_space_row(t, n, a) for t, n, a in examples])
-
-def recalc_area_df(df_in: pd.DataFrame):
-    df = df_in.copy()
-
-    required_cols = [
-        "Delete?", "Override $/SF?", "Space Name", "Space Type", "Area (SF)",
-        "Override $/SF Value", "$/SF", "Total Cost", "Notes"
-    ]
-    for c in required_cols:
-        if c not in df.columns:
-            df[c] = "" if c in ["Space Name", "Space Type", "Notes"] else 0
-
-    df["Area (SF)"] = pd.to_numeric(df["Area (SF)"], errors="coerce").fillna(0.0)
-    df["Override $/SF Value"] = pd.to_numeric(df["Override $/SF Value"], errors="coerce").fillna(0.0)
-    df["Override $/SF?"] = df["Override $/SF?"].astype(bool)
-    df["Delete?"] = df["Delete?"].astype(bool)
-
-    for i, row in df.iterrows():
-        stype = str(row.get("Space Type", ""))
-        override = bool(row.get("Override $/SF?", False))
-        lookup = RATE_LOOKUP.get(stype)
-
-        if override:
-            df.loc[i, "$/SF"] = float(row.get("Override $/SF Value", 0.0))
-        else:
-            df.loc[i, "$/SF"] = 0.0 if lookup is None else float(lookup)
-
-    df["Total Cost"] = df["Area (SF)"] * pd.to_numeric(df["$/SF"], errors="coerce").fillna(0.0)
-    return df
-
-# =========================================================
-# Tasks (your detailed weights)
-# =========================================================
-def electrical_defaults_df():
-    tasks = [
-        ("SD","PM: kickoff meetings / coordination",10),
-        ("SD","PM: schedule tracking",6),
-        ("SD","PM: client coordination (SD)",8),
-        ("SD","PM: internal reviews / QA",6),
-        ("SD","Utility research & service availability",10),
-        ("SD","Preliminary load calculations",14),
-        ("SD","Service & distribution concepts",16),
-        ("SD","Electrical room & shaft planning",12),
-        ("SD","Preliminary risers / one-lines",18),
-        ("SD","Typical unit power & lighting concepts",16),
-        ("SD","Common area electrical concepts",12),
-        ("SD","EV charging assumptions",8),
-        ("SD","Life safety & code analysis",10),
-        ("SD","Basis of Design narrative",12),
-        ("SD","SD review & revisions",10),
-        ("DD","PM: client coordination (DD)",8),
-        ("DD","PM: discipline coordination (DD)",8),
-        ("DD","PM: internal design reviews (DD)",6),
-        ("DD","Updated load calculations",14),
-        ("DD","Power plans – typical units",24),
-        ("DD","Power plans – common areas",22),
-        ("DD","Lighting layouts & controls",22),
-        ("DD","Equipment room layouts",12),
-        ("DD","Metering strategy",10),
-        ("DD","Panel schedules (DD level)",14),
-        ("DD","Riser & one-line refinement",14),
-        ("DD","Arch coordination",16),
-        ("DD","Mechanical coordination",12),
-        ("DD","Code compliance review",8),
-        ("DD","DD review & revisions",14),
-        ("CD","PM: issue management / meetings (CD)",10),
-        ("CD","PM: fee & scope tracking (CD)",6),
-        ("CD","Final unit power plans",36),
-        ("CD","Final common area power plans",30),
-        ("CD","Lighting plans & controls",32),
-        ("CD","Emergency / life safety systems",20),
-        ("CD","Final risers & one-lines",26),
-        ("CD","Final load calculations",12),
-        ("CD","Panel schedules (final)",28),
-        ("CD","Details & diagrams",18),
-        ("CD","Grounding & bonding",10),
-        ("CD","Specs & general notes",14),
-        ("CD","Discipline coordination",20),
-        ("CD","Internal QA/QC",18),
-        ("CD","Permit set issuance",12),
-        ("CD","Permit support",6),
-        ("CD","Plan check review",10),
-        ("CD","Comment responses",14),
-        ("CD","Drawing revisions (permit comments)",12),
-        ("CD","AHJ coordination",4),
-        ("Bidding","Contractor RFIs",16),
-        ("Bidding","Addenda",14),
-        ("Bidding","VE reviews",8),
-        ("Bidding","Bid evaluation support",8),
-        ("CA","PM: CA coordination & reporting",12),
-        ("CA","Submittal reviews",34),
-        ("CA","Shop drawings",20),
-        ("CA","RFIs",28),
-        ("CA","Site visits",22),
-        ("CA","Change order reviews",12),
-        ("CA","Punchlist support",12),
-        ("CA","As-built review",10),
-    ]
-    df = pd.DataFrame(tasks, columns=["Phase","Task","BaseHours"])
-    df["Enabled"] = True
-    return df
-
-def plumbing_defaults_df():
-    tasks = [
-        ("SD","SAN/VENT - Initial Sizing",3,""),
-        ("SD","SAN/VENT - Civil Coordination",9,""),
-        ("SD","SAN/VENT - Luxury Amenity",9,""),
-        ("SD","SAN/VENT - Luxury Units (hr/unit)",4,"lux_units_4hr"),
-        ("SD","SAN/VENT - Typical Units (hr/unit)",4,"typ_units_4hr"),
-        ("SD","STORM - Main Roof Sizing",18,""),
-        ("SD","STORM - Podium Sizing",9,"podium_only"),
-        ("SD","Domestic - Initial Sizing",4,""),
-        ("SD","Domestic - Pump Sizing",4,""),
-        ("DD","SAN/VENT - Potential Equipment Sizing",18,""),
-        ("DD","STORM - Riser Coordination Luxury",5,""),
-        ("DD","STORM - Offsets",4,""),
-        ("DD","STORM - Riser Coordination Typical",5,""),
-        ("DD","STORM - Riser Offsets",4,""),
-        ("DD","STORM - Podium",14,"podium_only"),
-        ("DD","Domestic - Ground Lvl distribution",10,""),
-        ("DD","Domestic - Amenity distribution",10,""),
-        ("DD","Domestic - Top Level distribution",10,""),
-        ("DD","Domestic - Unit Distribution (hr/unit)",2,"dom_units_2hr"),
-        ("CD","SAN/VENT - In building Collections",54,""),
-        ("CD","SAN/VENT - Ground Level Collections",9,""),
-        ("CD","SAN/VENT - Underground Collections",18,""),
-        ("CD","SAN/VENT - Isometrics",40,""),
-        ("CD","SAN/VENT - Derm Grease",9,""),
-        ("CD","STORM - Ground Level Collections",9,""),
-        ("CD","STORM - Underground Collections",18,""),
-        ("CD","STORM - Storm Isometrics",18,""),
-        ("CD","Domestic - Domestic Isometrics",18,""),
-        ("CD","Garage Drainage - Collections",27,""),
-        ("CD","Garage Drainage - Equipment Sizing",4,""),
-        ("CD","Garage Drainage - Civil Coordination",4,""),
-        ("CD","Garage Drainage - Isometric",18,""),
-        ("CD","Misc/Details/Schedules",18,""),
-        ("Bidding","Bidding support (Plumbing)",10,""),
-        ("CA","Submittals / RFIs / site support (Plumbing)",60,""),
-    ]
-    df = pd.DataFrame(tasks, columns=["Phase","Task","BaseHours","Tag"])
-    df["Enabled"] = True
-    return df
-
-def mechanical_defaults_df():
-    tasks = [
-        ("SD","Meetings",12),
-        ("SD","Preliminary load calcs",18),
-        ("SD","Preliminary sizing/routing",15),
-        ("SD","SD Narrative",8),
-        ("SD","QA/QC",2),
-        ("DD","Meetings",20),
-        ("DD","Load calcs",20),
-        ("DD","Coordination",10),
-        ("DD","Equipment selection",15),
-        ("DD","Details/Schedules",10),
-        ("DD","Chase/Shaft/BOH routing",15),
-        ("DD","Unit modeling",60),
-        ("DD","Amenity space modeling",40),
-        ("DD","QA/QC",8),
-        ("CD","Meetings",16),
-        ("CD","Coordination",10),
-        ("CD","Equipment selection",10),
-        ("CD","Details/Schedules",10),
-        ("CD","BOH routing/detailing",20),
-        ("CD","Unit modeling/detailing",40),
-        ("CD","Amenity space modeling",20),
-        ("CD","QA/QC",8),
-        ("Bidding","Meetings",25),
-        ("Bidding","Coordination",10),
-        ("Bidding","RFI/Submittals",20),
-        ("CA","CA Support (submittals/RFIs/site)",60),
-    ]
-    df = pd.DataFrame(tasks, columns=["Phase","Task","BaseHours"])
-    df["Enabled"] = True
-    return df
-
-def build_plumbing_task_df(lib_df: pd.DataFrame, podium: bool, lux_units: int, typ_units: int, dom_units: int) -> pd.DataFrame:
-    df = lib_df.copy()
-
-    # ---- FIX: make this resilient to older session_state frames missing Tag ----
-    if "Tag" not in df.columns:
-        df["Tag"] = ""
-    if "Enabled" not in df.columns:
-        df["Enabled"] = True
-    if "BaseHours" not in df.columns:
-        df["BaseHours"] = 0.0
-    if "Phase" not in df.columns:
-        df["Phase"] = "SD"
-    if "Task" not in df.columns:
-        df["Task"] = ""
-
-    df["Enabled"] = df["Enabled"].astype(bool)
-    df = df[df["Enabled"]].copy()
-    if df.empty:
-        return pd.DataFrame([{"Phase":"SD","Task":"No plumbing tasks enabled","BaseHours":1.0,"Enabled":True}])
-
-    df["BaseHours"] = pd.to_numeric(df["BaseHours"], errors="coerce").fillna(0.0)
-    df["Tag"] = df["Tag"].fillna("").astype(str)
-
-    rows = []
-    for _, r in df.iterrows():
-        tag = str(r.get("Tag", "")).strip()
-        ph = r["Phase"]
-        task = r["Task"]
-        base = float(r["BaseHours"])
-
-        if tag == "podium_only":
-            if not podium:
-                continue
-            rows.append({"Phase": ph, "Task": task, "BaseHours": base, "Enabled": True})
-        elif tag == "lux_units_4hr":
-            rows.append({"Phase": ph, "Task": task, "BaseHours": base * float(lux_units), "Enabled": True})
-        elif tag == "typ_units_4hr":
-            rows.append({"Phase": ph, "Task": task, "BaseHours": base * float(typ_units), "Enabled": True})
-        elif tag == "dom_units_2hr":
-            rows.append({"Phase": ph, "Task": task, "BaseHours": base * float(dom_units), "Enabled": True})
-        else:
-            rows.append({"Phase": ph, "Task": task, "BaseHours": base, "Enabled": True})
-
-    out = pd.DataFrame(rows)
-    if out.empty:
-        out = pd.DataFrame([{"Phase":"SD","Task":"No plumbing tasks enabled","BaseHours":1.0,"Enabled":True}])
-    return out[["Phase","Task","BaseHours","Enabled"]]
+from mep_core import (
+    AREA_CALC_COLS,
+    AREA_COLUMN_CONFIG,
+    AREA_COLUMNS,
+    AREA_DTYPES,
+    EMPTY_PLAN,
+    PHASES,
+    PLAN_COLUMN_CONFIG,
+    build_default_area_df,
+    build_plan_from_library,
+    build_plumbing_task_df,
+    electrical_defaults_df,
+    mechanical_defaults_df,
+    money,
+    new_space_row,
+    normalize_pct_dict,
+    pct,
+    plumbing_defaults_df,
+    recalc_area_df,
+    total_pct_badge,
+)
 
 # =========================================================
 # Session init
@@ -361,7 +31,14 @@ st.set_page_config(page_title="MEP Fee and Work Plan Generator", layout="wide")
 st.title("MEP Fee and Work Plan Generator")
 
 if "area_df" not in st.session_state:
-    st.session_state["area_df"] = build_default_area_df()
+    st.session_state["area_df"] = recalc_area_df(build_default_area_df())
+
+# ---- FIX: older session_state area_df frames may carry object-dtype columns ----
+_area_types = {c: t for c, t in AREA_DTYPES.items() if c in st.session_state["area_df"].columns}
+if any(st.session_state["area_df"][c].dtype != pd.api.types.pandas_dtype(t) for c, t in _area_types.items()):
+    # recalc_area_df coerces the numeric, flag and Space Type columns itself (NaN/blank safe);
+    # only Space Name is left for a plain cast
+    st.session_state["area_df"] = recalc_area_df(st.session_state["area_df"]).astype({"Space Name": AREA_DTYPES["Space Name"]})
 
 if "construction_cost_psf" not in st.session_state:
     st.session_state["construction_cost_psf"] = 300.0
@@ -408,8 +85,10 @@ if "Tag" not in st.session_state["plumbing_lib"].columns:
 # =========================================================
 with st.sidebar:
     st.header("Rate Inputs")
-    st.session_state["base_raw_rate"] = st.number_input("Base Raw Rate ($/hr)", min_value=0.0, value=float(st.session_state["base_raw_rate"]), step=1.0)
-    st.session_state["multiplier"] = st.number_input("Multiplier", min_value=0.0, value=float(st.session_state["multiplier"]), step=0.1, format="%.2f")
+    with st.form("rate_form"):
+        st.session_state["base_raw_rate"] = st.number_input("Base Raw Rate ($/hr)", min_value=0.0, value=float(st.session_state["base_raw_rate"]), step=1.0)
+        st.session_state["multiplier"] = st.number_input("Multiplier", min_value=0.0, value=float(st.session_state["multiplier"]), step=0.1, format="%.2f")
+        st.form_submit_button("Apply")
 billing_rate = float(st.session_state["base_raw_rate"]) * float(st.session_state["multiplier"])
 
 # =========================================================
@@ -417,16 +96,18 @@ billing_rate = float(st.session_state["base_raw_rate"]) * float(st.session_state
 # =========================================================
 st.subheader("Project Cost & Fee Context")
 
-st.session_state["area_df"] = recalc_area_df(st.session_state["area_df"])
-total_area = float(pd.to_numeric(st.session_state["area_df"]["Area (SF)"], errors="coerce").fillna(0.0).sum())
+# area_df always carries the $/SF and Total Cost from its last recalc, so read it directly
+total_area = float(st.session_state["area_df"]["Area (SF)"].sum())
 
-top1, top2, top3 = st.columns([1.1, 1, 1])
-with top1:
-    st.markdown(f"**Total Area:** {total_area:,.0f} SF")
-with top2:
-    st.session_state["construction_cost_psf"] = st.number_input("Construction Cost ($/SF)", min_value=0.0, value=float(st.session_state["construction_cost_psf"]), step=5.0)
-with top3:
-    st.session_state["arch_fee_pct"] = st.number_input("Arch Fee (%)", min_value=0.0, value=float(st.session_state["arch_fee_pct"]), step=0.1, format="%.2f")
+with st.form("project_cost_form"):
+    top1, top2, top3 = st.columns([1.1, 1, 1])
+    with top1:
+        st.markdown(f"**Total Area:** {total_area:,.0f} SF")
+    with top2:
+        st.session_state["construction_cost_psf"] = st.number_input("Construction Cost ($/SF)", min_value=0.0, value=float(st.session_state["construction_cost_psf"]), step=5.0)
+    with top3:
+        st.session_state["arch_fee_pct"] = st.number_input("Arch Fee (%)", min_value=0.0, value=float(st.session_state["arch_fee_pct"]), step=0.1, format="%.2f")
+    st.form_submit_button("Apply")
 
 construction_cost_total = total_area * float(st.session_state["construction_cost_psf"])
 arch_fee_total = construction_cost_total * (float(st.session_state["arch_fee_pct"]) / 100.0)
@@ -448,30 +129,35 @@ with ac3:
 # Phase & Discipline Splits + Total % badges
 # =========================================================
 st.subheader("Design Phase Fee % Split")
-p1, p2, p3, p4, p5, p6 = st.columns([1, 1, 1, 1, 1, 0.9])
-ps = st.session_state["phase_split"]
-ps["SD"] = p1.number_input("SD (%)", min_value=0.0, value=float(ps.get("SD", 12.0)), step=0.5, format="%.1f")
-ps["DD"] = p2.number_input("DD (%)", min_value=0.0, value=float(ps.get("DD", 40.0)), step=0.5, format="%.1f")
-ps["CD"] = p3.number_input("CD (%)", min_value=0.0, value=float(ps.get("CD", 28.0)), step=0.5, format="%.1f")
-ps["Bidding"] = p4.number_input("Bidding (%)", min_value=0.0, value=float(ps.get("Bidding", 1.5)), step=0.1, format="%.1f")
-ps["CA"] = p5.number_input("CA (%)", min_value=0.0, value=float(ps.get("CA", 18.5)), step=0.5, format="%.1f")
-phase_total = float(ps["SD"] + ps["DD"] + ps["CD"] + ps["Bidding"] + ps["CA"])
-with p6:
-    st.markdown(total_pct_badge(phase_total, "Total %"), unsafe_allow_html=True)
+# Forms batch edits: the fee pipeline reruns once on Apply, not on every keystroke
+with st.form("phase_split_form"):
+    p1, p2, p3, p4, p5, p6 = st.columns([1, 1, 1, 1, 1, 0.9])
+    ps = st.session_state["phase_split"]
+    ps["SD"] = p1.number_input("SD (%)", min_value=0.0, value=float(ps.get("SD", 12.0)), step=0.5, format="%.1f")
+    ps["DD"] = p2.number_input("DD (%)", min_value=0.0, value=float(ps.get("DD", 40.0)), step=0.5, format="%.1f")
+    ps["CD"] = p3.number_input("CD (%)", min_value=0.0, value=float(ps.get("CD", 28.0)), step=0.5, format="%.1f")
+    ps["Bidding"] = p4.number_input("Bidding (%)", min_value=0.0, value=float(ps.get("Bidding", 1.5)), step=0.1, format="%.1f")
+    ps["CA"] = p5.number_input("CA (%)", min_value=0.0, value=float(ps.get("CA", 18.5)), step=0.5, format="%.1f")
+    phase_total = float(np.fromiter((ps[k] for k in PHASES), dtype=np.float64, count=len(PHASES)).sum())
+    with p6:
+        st.markdown(total_pct_badge(phase_total, "Total %"), unsafe_allow_html=True)
+    st.form_submit_button("Apply")
 st.session_state["phase_split"] = ps
 
 st.subheader("Discipline % of MEP Fee")
-d1, d2, d3, d4 = st.columns([1, 1, 1, 0.9])
-with d1:
-    st.session_state["electrical_pct"] = st.number_input("Electrical (%)", min_value=0.0, value=float(st.session_state["electrical_pct"]), step=0.5, format="%.1f")
-with d2:
-    st.session_state["plumbing_fire_pct"] = st.number_input("Plumbing / Fire (%)", min_value=0.0, value=float(st.session_state["plumbing_fire_pct"]), step=0.5, format="%.1f")
-with d3:
-    st.session_state["mechanical_pct"] = st.number_input("Mechanical (%)", min_value=0.0, value=float(st.session_state["mechanical_pct"]), step=0.5, format="%.1f")
-
-disc_total = float(st.session_state["electrical_pct"] + st.session_state["plumbing_fire_pct"] + st.session_state["mechanical_pct"])
-with d4:
-    st.markdown(total_pct_badge(disc_total, "Total %"), unsafe_allow_html=True)
+with st.form("discipline_pct_form"):
+    d1, d2, d3, d4 = st.columns([1, 1, 1, 0.9])
+    with d1:
+        st.session_state["electrical_pct"] = st.number_input("Electrical (%)", min_value=0.0, value=float(st.session_state["electrical_pct"]), step=0.5, format="%.1f")
+    with d2:
+        st.session_state["plumbing_fire_pct"] = st.number_input("Plumbing / Fire (%)", min_value=0.0, value=float(st.session_state["plumbing_fire_pct"]), step=0.5, format="%.1f")
+    with d3:
+        st.session_state["mechanical_pct"] = st.number_input("Mechanical (%)", min_value=0.0, value=float(st.session_state["mechanical_pct"]), step=0.5, format="%.1f")
+
+    disc_total = float(np.array([st.session_state["electrical_pct"], st.session_state["plumbing_fire_pct"], st.session_state["mechanical_pct"]], dtype=np.float64).sum())
+    with d4:
+        st.markdown(total_pct_badge(disc_total, "Total %"), unsafe_allow_html=True)
+    st.form_submit_button("Apply")
 
 # =========================================================
 # Design Fee Summary + Area Calculator
@@ -482,40 +168,39 @@ st.markdown("#### Area-Based Fee Calculator (Drives MEP Fee)")
 a1, a2, a3 = st.columns([1, 1, 2])
 with a1:
     if st.button("➕ Add Row"):
-        st.session_state["area_df"] = pd.concat(
-            [st.session_state["area_df"], pd.DataFrame([new_space_row()])],
-            ignore_index=True,
-        )
+        # Enlarge in place (area_df keeps a RangeIndex) instead of concat-copying every column
+        df_add = st.session_state["area_df"]
+        df_add.loc[len(df_add)] = new_space_row()
+        st.session_state["area_df"] = recalc_area_df(df_add)
 with a2:
     if st.button("🗑️ Delete Checked Rows"):
-        df_del = st.session_state["area_df"].copy()
-        df_del = df_del[df_del["Delete?"] != True].reset_index(drop=True)
-        st.session_state["area_df"] = df_del
+        df_del = st.session_state["area_df"]
+        del_mask = df_del["Delete?"].fillna(False).astype(bool).to_numpy()
+        st.session_state["area_df"] = df_del.iloc[~del_mask].reset_index(drop=True)
 with a3:
     st.caption("$/SF auto-fills from Space Type unless Override is checked. Total Cost is calculated.")
 
-st.session_state["area_df"] = recalc_area_df(st.session_state["area_df"])
-
 edited_area = st.data_editor(
     st.session_state["area_df"],
     use_container_width=True,
     hide_index=True,
     key="area_editor",
-    column_config={
-        "Delete?": st.column_config.CheckboxColumn(width="small"),
-        "Override $/SF?": st.column_config.CheckboxColumn(width="small"),
-        "Space Name": st.column_config.TextColumn(width="medium"),
-        "Space Type": st.column_config.SelectboxColumn(options=SPACE_TYPES, width="medium"),
-        "Area (SF)": st.column_config.NumberColumn(min_value=0, step=1, format="%d", width="small"),
-        "Override $/SF Value": st.column_config.NumberColumn(min_value=0.0, step=0.05, format="%.2f", width="small"),
-        "$/SF": st.column_config.NumberColumn(format="%.2f", disabled=True, width="small"),
-        "Total Cost": st.column_config.NumberColumn(format="%.0f", disabled=True, width="small"),
-        "Notes": st.column_config.TextColumn(width="large"),
-    },
+    column_config=AREA_COLUMN_CONFIG,
+    column_order=AREA_COLUMNS,
+    disabled=["$/SF", "Total Cost"],
+    num_rows="fixed",
 )
 
-edited_area = edited_area[edited_area["Delete?"] != True].reset_index(drop=True)
-st.session_state["area_df"] = recalc_area_df(edited_area)
+del_mask = edited_area["Delete?"].fillna(False).astype(bool).to_numpy()
+if del_mask.any():
+    edited_area = edited_area.iloc[~del_mask].reset_index(drop=True)
+prior_area = st.session_state["area_df"]
+if edited_area[AREA_CALC_COLS].equals(prior_area[AREA_CALC_COLS]):
+    # No pricing input changed: area_df is always priced as of its last change
+    # (init, legacy fix, Add Row, editor), so $/SF and Total Cost still hold
+    st.session_state["area_df"] = edited_area
+else:
+    st.session_state["area_df"] = recalc_area_df(edited_area)
 
 area_mep_fee = float(st.session_state["area_df"]["Total Cost"].sum())
 mep_pct_of_arch = (area_mep_fee / arch_fee_total) if arch_fee_total > 0 else 0.0
@@ -549,55 +234,69 @@ plumbing_fee = plumbing_fire_target_fee - fire_fee
 st.divider()
 st.subheader("Work Plan Generator")
 
-pf_inputs = st.columns([1.2, 1, 1, 1, 1.2])
-with pf_inputs[0]:
-    st.caption("Plumbing / Fire inputs")
-    st.session_state["podium"] = st.checkbox("Include Podium", value=bool(st.session_state["podium"]))
-with pf_inputs[1]:
-    st.caption("Luxury units")
-    st.session_state["lux_units"] = st.number_input("", min_value=0, value=int(st.session_state["lux_units"]), step=1, label_visibility="collapsed")
-with pf_inputs[2]:
-    st.caption("Typical units")
-    st.session_state["typ_units"] = st.number_input("", min_value=0, value=int(st.session_state["typ_units"]), step=1, label_visibility="collapsed")
-with pf_inputs[3]:
-    st.caption("Domestic units")
-    st.session_state["dom_units"] = st.number_input("", min_value=0, value=int(st.session_state["dom_units"]), step=1, label_visibility="collapsed")
-with pf_inputs[4]:
-    st.caption("Fire carveout")
-    st.write("10% of Plumbing/Fire fee")
-
-e_plan = build_plan_from_library(st.session_state["electrical_lib"], electrical_target_fee, billing_rate, st.session_state["phase_split"])
-
-pl_base = build_plumbing_task_df(
-    st.session_state["plumbing_lib"],
-    st.session_state["podium"],
-    st.session_state["lux_units"],
-    st.session_state["typ_units"],
-    st.session_state["dom_units"]
-)
-p_plan = build_plan_from_library(pl_base, plumbing_fee, billing_rate, st.session_state["phase_split"])
-
-fire_lib = pd.DataFrame([{"Phase": ph, "Task": "Fire Protection", "BaseHours": 1.0, "Enabled": True} for ph in PHASES])
-f_plan = build_plan_from_library(fire_lib, fire_fee, billing_rate, st.session_state["phase_split"])
-pf_plan = pd.concat([p_plan, f_plan], ignore_index=True)
-
-m_plan = build_plan_from_library(st.session_state["mechanical_lib"], mechanical_target_fee, billing_rate, st.session_state["phase_split"])
+with st.form("plumbing_inputs_form"):
+    pf_inputs = st.columns([1.2, 1, 1, 1, 1.2])
+    with pf_inputs[0]:
+        st.caption("Plumbing / Fire inputs")
+        st.session_state["podium"] = st.checkbox("Include Podium", value=bool(st.session_state["podium"]))
+    with pf_inputs[1]:
+        st.caption("Luxury units")
+        st.session_state["lux_units"] = st.number_input("", min_value=0, value=int(st.session_state["lux_units"]), step=1, label_visibility="collapsed")
+    with pf_inputs[2]:
+        st.caption("Typical units")
+        st.session_state["typ_units"] = st.number_input("", min_value=0, value=int(st.session_state["typ_units"]), step=1, label_visibility="collapsed")
+    with pf_inputs[3]:
+        st.caption("Domestic units")
+        st.session_state["dom_units"] = st.number_input("", min_value=0, value=int(st.session_state["dom_units"]), step=1, label_visibility="collapsed")
+    with pf_inputs[4]:
+        st.caption("Fire carveout")
+        st.write("10% of Plumbing/Fire fee")
+    st.form_submit_button("Apply")
+
+if area_mep_fee <= 0:
+    # Nothing to allocate: skip the plan builds entirely
+    e_plan = pf_plan = m_plan = EMPTY_PLAN
+else:
+    # Normalize the phase split once and share it across all disciplines
+    phase_frac = normalize_pct_dict(st.session_state["phase_split"])
+
+    e_plan = build_plan_from_library(st.session_state["electrical_lib"], electrical_target_fee, billing_rate, phase_frac)
+
+    pl_base = build_plumbing_task_df(
+        st.session_state["plumbing_lib"],
+        st.session_state["podium"],
+        st.session_state["lux_units"],
+        st.session_state["typ_units"],
+        st.session_state["dom_units"]
+    )
+    p_plan = build_plan_from_library(pl_base, plumbing_fee, billing_rate, phase_frac)
+
+    fire_lib = pd.DataFrame([{"Phase": ph, "Task": "Fire Protection", "BaseHours": 1.0, "Enabled": True} for ph in PHASES])
+    f_plan = build_plan_from_library(fire_lib, fire_fee, billing_rate, phase_frac)
+    pf_plan = pd.concat([p_plan, f_plan], ignore_index=True)
+
+    m_plan = build_plan_from_library(st.session_state["mechanical_lib"], mechanical_target_fee, billing_rate, phase_frac)
 
 def render_section(title: str, plan_df: pd.DataFrame):
     st.subheader(title)
+    # Discipline switched off or no fee: skip the phase loop
+    if plan_df.empty or not plan_df["Hours"].to_numpy().any():
+        st.info("No hours for this discipline")
+        return
+    # One groupby serves the phase headers, the grand total and the per-phase bodies
+    groups = plan_df.groupby("Phase", sort=False, observed=True)
+    tot = groups[["Hours", "Fee ($)"]].sum()
+    grand = tot.sum()
     for ph in PHASES:
-        d = plan_df[plan_df["Phase"] == ph].copy()
-        if d.empty:
+        if ph not in tot.index:
             continue
-        hrs = float(d["Hours"].sum())
-        fee = float(d["Fee ($)"].sum())
+        hrs, fee = (float(v) for v in tot.loc[ph])
+        d = groups.get_group(ph)
         with st.expander(f"{ph} — {hrs:,.1f} hrs | {money(fee)}", expanded=False):
-            show = d[["Task", "Hours", "Fee ($)"]].copy()
-            show["Fee ($)"] = show["Fee ($)"].apply(lambda v: money(float(v)))
-            st.dataframe(show, use_container_width=True, hide_index=True)
+            st.dataframe(d[["Task", "Hours", "Fee ($)"]], use_container_width=True, hide_index=True, column_config=PLAN_COLUMN_CONFIG)
 
     st.divider()
-    st.markdown(f"### TOTAL\n**{float(plan_df['Hours'].sum()):,.1f} hrs** | **{money(float(plan_df['Fee ($)'].sum()))}**")
+    st.markdown(f"### TOTAL\n**{float(grand['Hours']):,.1f} hrs** | **{money(float(grand['Fee ($)']))}**")
 
 col_e, col_pf, col_m = st.columns(3)
 with col_e:
@@ -0,0 +1,437 @@
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the pandas groupby path is used without it
+    njit = None
+
+PHASES = ["SD", "DD", "CD", "Bidding", "CA"]
+
+# =========================================================
+# Helpers
+# =========================================================
+@lru_cache(maxsize=256)
+def money(x: float) -> str:
+    return f"${x:,.0f}"
+
+@lru_cache(maxsize=256)
+def pct(x: float) -> str:
+    return f"{x*100:,.2f}%"
+
+def normalize_pct_dict(d: dict) -> dict:
+    # Phase keys are fixed, so normalize over PHASES in one numpy pass
+    arr = np.fromiter((max(float(d.get(k, 0.0)), 0.0) for k in PHASES), dtype=np.float64, count=len(PHASES))
+    total = arr.sum()
+    arr = np.full_like(arr, 1.0 / len(PHASES)) if total <= 0 else arr / total
+    return dict(zip(PHASES, arr.tolist()))
+
+_BADGE_TEMPLATE = (
+    '<div style="padding:10px 12px;border-radius:10px;color:white;font-weight:700;'
+    'display:inline-block;background:{bg};min-width:140px;text-align:center;">{label}: {total:,.1f}%</div>'
+)
+
+def total_pct_badge(total_pct: float, label: str = "Total %") -> str:
+    ok = abs(float(total_pct) - 100.0) < 0.01
+    return _BADGE_TEMPLATE.format(bg="#16a34a" if ok else "#dc2626", label=label, total=float(total_pct))  # green / red
+
+PLAN_LIB_COLS = ["Phase", "Task", "BaseHours", "Enabled"]
+
+def _alloc_hours(base_hours, phase_code, phase_fee, billing_rate):
+    # Two passes: per-phase weight sums, then each task's share of its phase hours
+    phase_sum = np.zeros(phase_fee.shape[0])
+    for i in range(base_hours.shape[0]):
+        phase_sum[phase_code[i]] += base_hours[i]
+    hours = np.zeros(base_hours.shape[0])
+    fees = np.zeros(base_hours.shape[0])
+    if billing_rate > 0:
+        for i in range(base_hours.shape[0]):
+            p = phase_code[i]
+            if phase_sum[p] > 0:
+                hours[i] = base_hours[i] / phase_sum[p] * (phase_fee[p] / billing_rate)
+                fees[i] = hours[i] * billing_rate
+    return hours, fees
+
+if njit is not None:
+    _alloc_hours_jit = njit(cache=True)(_alloc_hours)
+    # Warm the JIT at import so the first user interaction doesn't pay the compile
+    _alloc_hours_jit(np.ones(1), np.zeros(1, dtype=np.int64), np.ones(len(PHASES)), 1.0)
+else:
+    _alloc_hours_jit = None
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _plan_cached(lib_key: tuple, target_fee: float, billing_rate: float, phase_frac_key: tuple) -> pd.DataFrame:
+    phase_frac = dict(phase_frac_key)
+
+    lib = pd.DataFrame(list(lib_key), columns=PLAN_LIB_COLS)
+    # Categorical Phase: the isin / groupby below run on integer codes
+    lib["Phase"] = pd.Categorical(lib["Phase"], categories=PHASES, ordered=True)
+    keep = lib["Enabled"].astype(bool) & lib["Phase"].isin(PHASES)
+    df = lib.loc[keep, ["Phase", "Task", "BaseHours"]].reset_index(drop=True)
+
+    if df.empty:
+        return pd.DataFrame([{"Phase": "SD", "Task": "No tasks enabled", "Hours": 0.0, "Fee ($)": 0.0}])
+
+    df["BaseHours"] = df["BaseHours"].astype(np.float64, copy=False)
+
+    if _alloc_hours_jit is not None:
+        phase_fee = float(target_fee) * np.array([float(phase_frac.get(ph, 0.0)) for ph in PHASES])
+        hours, fee = _alloc_hours_jit(
+            df["BaseHours"].to_numpy(dtype=np.float64),
+            df["Phase"].cat.codes.to_numpy(dtype=np.int64),
+            phase_fee,
+            float(billing_rate),
+        )
+    else:
+        # One groupby pass for the per-phase weight sums instead of slicing each phase
+        frac = df["Phase"].map(phase_frac).astype(float).fillna(0.0)
+        w_sum = df.groupby("Phase", observed=True)["BaseHours"].transform("sum")
+        phase_hours = (float(target_fee) * frac / billing_rate) if billing_rate > 0 else 0.0
+        hours = np.where(w_sum > 0, df["BaseHours"] / w_sum.where(w_sum > 0, 1.0) * phase_hours, 0.0)
+        fee = hours * billing_rate
+
+    # Single output allocation sized to the enabled rows; no per-phase frames to concat
+    return pd.DataFrame({"Phase": df["Phase"].array, "Task": df["Task"].array, "Hours": hours, "Fee ($)": fee})
+
+def build_plan_from_library(task_df: pd.DataFrame, target_fee: float, billing_rate: float, phase_frac: dict) -> pd.DataFrame:
+    df = task_df
+    if "Enabled" not in df.columns:
+        df = df.assign(Enabled=True)
+    if "BaseHours" not in df.columns:
+        df = df.assign(BaseHours=0.0)
+
+    # Hashable keys so identical libraries / fees / splits reuse the cached plan across reruns
+    lib_key = tuple(df[PLAN_LIB_COLS].itertuples(index=False, name=None))
+    phase_frac_key = tuple(sorted(phase_frac.items()))
+    # cache_resource skips output hashing/pickling; copy so callers never mutate the cached frame
+    return _plan_cached(lib_key, round(float(target_fee), 2), float(billing_rate), phase_frac_key).copy()
+
+EMPTY_PLAN = pd.DataFrame({"Phase": ["SD"], "Task": ["No fee"], "Hours": [0.0], "Fee ($)": [0.0]})
+
+# Rounding happens at display time only; the plan frames keep full precision
+PLAN_COLUMN_CONFIG = {
+    "Hours": st.column_config.NumberColumn(format="%.1f"),
+    "Fee ($)": st.column_config.NumberColumn(format="$%,.0f"),
+}
+
+# =========================================================
+# Area $/SF Lookup
+# =========================================================
+RATE_LOOKUP = {
+    "Office (Fitout / Renovation)": 1.50,
+    "Office (Core & Shell)": 0.95,
+    "Lobby / Reception": 1.50,
+    "Conference Rooms": 1.50,
+    "Ballrooms": 1.75,
+    "Hotel Rooms": 1.50,
+    "Retail (dry non-cooking)": 0.85,
+    "Retail (Core & Shell Restaurant)": 0.95,
+    "Restaurant (Kitchen / Dining Areas)": 2.75,
+    "Parking (Open)": 0.35,
+    "Parking (Enclosed)": 0.45,
+    "Multifamily (Garden Style)": 0.85,
+    "Multifamily (High Rise)": 1.01,
+    "BOH Rooms": 0.75,
+    "Classroom": 1.50,
+    "Bar / Lounge Areas": 1.25,
+    "Amenity Areas": 1.25,
+    "Manufacturing Light (Mainly Storage)": 0.95,
+    "Manufacturing Complex (Process Equipment Etc.)": 1.50,
+    "Site Lighting": None,
+    "Site Parking": None,
+}
+SPACE_TYPES = list(RATE_LOOKUP.keys())
+# Rates aligned to SPACE_TYPES category codes. None (no default rate) folds to 0.0,
+# and the trailing 0.0 is what unknown types (code -1) land on.
+_RATES = np.array([0.0 if v is None else float(v) for v in RATE_LOOKUP.values()] + [0.0], dtype=np.float64)
+
+def new_space_row(space_type=None, name="", area=0):
+    if space_type is None:
+        space_type = SPACE_TYPES[0]
+    return {
+        "Delete?": False,
+        "Override $/SF?": False,
+        "Space Name": name,
+        "Space Type": space_type,
+        "Area (SF)": int(area),
+        "Override $/SF Value": 0.0,
+        "$/SF": 0.0,
+        "Total Cost": 0.0,
+        "Notes": "",
+    }
+
+AREA_COLUMNS = [
+    "Delete?", "Override $/SF?", "Space Name", "Space Type", "Area (SF)",
+    "Override $/SF Value", "$/SF", "Total Cost", "Notes",
+]
+AREA_DTYPES = {
+    "Area (SF)": "int64",
+    "Override $/SF Value": "float64",
+    "$/SF": "float64",
+    "Total Cost": "float64",
+    "Override $/SF?": "bool",
+    "Delete?": "bool",
+    "Space Name": "string",
+    "Space Type": pd.CategoricalDtype(SPACE_TYPES),
+}
+
+def build_default_area_df():
+    examples = [
+        ("Amenity Areas", "Amenities", 18000),
+        ("BOH Rooms", "Back of House", 14000),
+        ("Retail (Core & Shell Restaurant)", "Retail", 5000),
+        ("Office (Core & Shell)", "Office", 4500),
+        ("Parking (Enclosed)", "Parking", 80000),
+        ("Multifamily (High Rise)", "Residential", 175000),
+        ("Restaurant (Kitchen / Dining Areas)", "Restaurant", 3000),
+        ("Site Lighting", "Site Lighting (override)", 0),
+    ]
+    records = tuple((False, False, n, t, int(a), 0.0, 0.0, 0.0, "") for t, n, a in examples)
+    return pd.DataFrame.from_records(records, columns=AREA_COLUMNS).astype(AREA_DTYPES)
+
+# Editor column setup lives here so it is built once per process, not on every rerun
+AREA_COLUMN_CONFIG = {
+    "Delete?": st.column_config.CheckboxColumn(width="small"),
+    "Override $/SF?": st.column_config.CheckboxColumn(width="small"),
+    "Space Name": st.column_config.TextColumn(width="medium"),
+    "Space Type": st.column_config.SelectboxColumn(options=SPACE_TYPES, width="medium"),
+    "Area (SF)": st.column_config.NumberColumn(min_value=0, step=1, format="%d", width="small"),
+    "Override $/SF Value": st.column_config.NumberColumn(min_value=0.0, step=0.05, format="%.2f", width="small"),
+    "$/SF": st.column_config.NumberColumn(format="%.2f", width="small"),
+    "Total Cost": st.column_config.NumberColumn(format="%.0f", width="small"),
+    "Notes": st.column_config.TextColumn(width="large"),
+}
+
+AREA_CALC_COLS = ["Space Type", "Area (SF)", "Override $/SF?", "Override $/SF Value"]
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _recalc_area_cached(key_tuple: tuple) -> pd.DataFrame:
+    df = pd.DataFrame(list(key_tuple), columns=AREA_CALC_COLS)
+    # Vectorized lookup: no per-row iterrows / .loc writes on every rerun
+    codes = pd.Categorical(df["Space Type"], categories=SPACE_TYPES).codes
+    base = _RATES[codes]
+    override = df["Override $/SF?"].to_numpy(dtype=bool)
+    psf = np.where(override, df["Override $/SF Value"].to_numpy(dtype=float), base)
+    total = df["Area (SF)"].to_numpy(dtype=float) * psf
+    return pd.DataFrame({"$/SF": psf, "Total Cost": total})
+
+def recalc_area_df(df: pd.DataFrame):
+    for c in AREA_COLUMNS:
+        if c not in df.columns:
+            df[c] = "" if c in ["Space Name", "Space Type", "Notes"] else 0
+
+    # Already-typed columns (the usual case) skip the coercing to_numeric pass
+    if df["Area (SF)"].dtype != AREA_DTYPES["Area (SF)"]:
+        df["Area (SF)"] = pd.to_numeric(df["Area (SF)"], errors="coerce").fillna(0).astype(AREA_DTYPES["Area (SF)"])
+    if df["Override $/SF Value"].dtype.kind != "f":
+        df["Override $/SF Value"] = pd.to_numeric(df["Override $/SF Value"], errors="coerce")
+    df["Override $/SF Value"] = df["Override $/SF Value"].fillna(0.0)
+    df["Override $/SF?"] = df["Override $/SF?"].astype(bool)
+    df["Delete?"] = df["Delete?"].astype(bool)
+    df["Space Type"] = pd.Categorical(df["Space Type"], categories=SPACE_TYPES)
+
+    # Only these columns drive $/SF and Total Cost; reruns with the same inputs hit the cache
+    _key = tuple(df[AREA_CALC_COLS].itertuples(index=False, name=None))
+    calc = _recalc_area_cached(_key).copy()
+    df["$/SF"] = calc["$/SF"].to_numpy()
+    df["Total Cost"] = calc["Total Cost"].to_numpy()
+    return df
+
+# =========================================================
+# Tasks (your detailed weights)
+# =========================================================
+# Built once per process; callers get their own copy to edit.
+# Base hours are small whole numbers, so float32 is exact; Phase/Tag repeat heavily.
+TASK_DTYPES = {"Phase": pd.CategoricalDtype(PHASES, ordered=True), "BaseHours": "float32"}
+PLUMBING_TAGS = ["", "podium_only", "lux_units_4hr", "typ_units_4hr", "dom_units_2hr"]
+
+def _build_defaults(rows: tuple, cols: list, dtypes: dict = TASK_DTYPES) -> pd.DataFrame:
+    # Transpose the row tuples into columns so pandas builds each column in one pass
+    data = dict(zip(cols, map(list, zip(*rows))))
+    return pd.DataFrame(data, columns=cols).assign(Enabled=True).astype(dtypes)
+
+_ELEC_TASKS = (
+    ("SD","PM: kickoff meetings / coordination",10),
+    ("SD","PM: schedule tracking",6),
+    ("SD","PM: client coordination (SD)",8),
+    ("SD","PM: internal reviews / QA",6),
+    ("SD","Utility research & service availability",10),
+    ("SD","Preliminary load calculations",14),
+    ("SD","Service & distribution concepts",16),
+    ("SD","Electrical room & shaft planning",12),
+    ("SD","Preliminary risers / one-lines",18),
+    ("SD","Typical unit power & lighting concepts",16),
+    ("SD","Common area electrical concepts",12),
+    ("SD","EV charging assumptions",8),
+    ("SD","Life safety & code analysis",10),
+    ("SD","Basis of Design narrative",12),
+    ("SD","SD review & revisions",10),
+    ("DD","PM: client coordination (DD)",8),
+    ("DD","PM: discipline coordination (DD)",8),
+    ("DD","PM: internal design reviews (DD)",6),
+    ("DD","Updated load calculations",14),
+    ("DD","Power plans – typical units",24),
+    ("DD","Power plans – common areas",22),
+    ("DD","Lighting layouts & controls",22),
+    ("DD","Equipment room layouts",12),
+    ("DD","Metering strategy",10),
+    ("DD","Panel schedules (DD level)",14),
+    ("DD","Riser & one-line refinement",14),
+    ("DD","Arch coordination",16),
+    ("DD","Mechanical coordination",12),
+    ("DD","Code compliance review",8),
+    ("DD","DD review & revisions",14),
+    ("CD","PM: issue management / meetings (CD)",10),
+    ("CD","PM: fee & scope tracking (CD)",6),
+    ("CD","Final unit power plans",36),
+    ("CD","Final common area power plans",30),
+    ("CD","Lighting plans & controls",32),
+    ("CD","Emergency / life safety systems",20),
+    ("CD","Final risers & one-lines",26),
+    ("CD","Final load calculations",12),
+    ("CD","Panel schedules (final)",28),
+    ("CD","Details & diagrams",18),
+    ("CD","Grounding & bonding",10),
+    ("CD","Specs & general notes",14),
+    ("CD","Discipline coordination",20),
+    ("CD","Internal QA/QC",18),
+    ("CD","Permit set issuance",12),
+    ("CD","Permit support",6),
+    ("CD","Plan check review",10),
+    ("CD","Comment responses",14),
+    ("CD","Drawing revisions (permit comments)",12),
+    ("CD","AHJ coordination",4),
+    ("Bidding","Contractor RFIs",16),
+    ("Bidding","Addenda",14),
+    ("Bidding","VE reviews",8),
+    ("Bidding","Bid evaluation support",8),
+    ("CA","PM: CA coordination & reporting",12),
+    ("CA","Submittal reviews",34),
+    ("CA","Shop drawings",20),
+    ("CA","RFIs",28),
+    ("CA","Site visits",22),
+    ("CA","Change order reviews",12),
+    ("CA","Punchlist support",12),
+    ("CA","As-built review",10),
+)
+_ELEC_DEFAULT_DF = _build_defaults(_ELEC_TASKS, ["Phase","Task","BaseHours"])
+
+def electrical_defaults_df():
+    return _ELEC_DEFAULT_DF.copy()
+
+_PLUMB_TASKS = (
+    ("SD","SAN/VENT - Initial Sizing",3,""),
+    ("SD","SAN/VENT - Civil Coordination",9,""),
+    ("SD","SAN/VENT - Luxury Amenity",9,""),
+    ("SD","SAN/VENT - Luxury Units (hr/unit)",4,"lux_units_4hr"),
+    ("SD","SAN/VENT - Typical Units (hr/unit)",4,"typ_units_4hr"),
+    ("SD","STORM - Main Roof Sizing",18,""),
+    ("SD","STORM - Podium Sizing",9,"podium_only"),
+    ("SD","Domestic - Initial Sizing",4,""),
+    ("SD","Domestic - Pump Sizing",4,""),
+    ("DD","SAN/VENT - Potential Equipment Sizing",18,""),
+    ("DD","STORM - Riser Coordination Luxury",5,""),
+    ("DD","STORM - Offsets",4,""),
+    ("DD","STORM - Riser Coordination Typical",5,""),
+    ("DD","STORM - Riser Offsets",4,""),
+    ("DD","STORM - Podium",14,"podium_only"),
+    ("DD","Domestic - Ground Lvl distribution",10,""),
+    ("DD","Domestic - Amenity distribution",10,""),
+    ("DD","Domestic - Top Level distribution",10,""),
+    ("DD","Domestic - Unit Distribution (hr/unit)",2,"dom_units_2hr"),
+    ("CD","SAN/VENT - In building Collections",54,""),
+    ("CD","SAN/VENT - Ground Level Collections",9,""),
+    ("CD","SAN/VENT - Underground Collections",18,""),
+    ("CD","SAN/VENT - Isometrics",40,""),
+    ("CD","SAN/VENT - Derm Grease",9,""),
+    ("CD","STORM - Ground Level Collections",9,""),
+    ("CD","STORM - Underground Collections",18,""),
+    ("CD","STORM - Storm Isometrics",18,""),
+    ("CD","Domestic - Domestic Isometrics",18,""),
+    ("CD","Garage Drainage - Collections",27,""),
+    ("CD","Garage Drainage - Equipment Sizing",4,""),
+    ("CD","Garage Drainage - Civil Coordination",4,""),
+    ("CD","Garage Drainage - Isometric",18,""),
+    ("CD","Misc/Details/Schedules",18,""),
+    ("Bidding","Bidding support (Plumbing)",10,""),
+    ("CA","Submittals / RFIs / site support (Plumbing)",60,""),
+)
+_PLUMB_DEFAULT_DF = _build_defaults(
+    _PLUMB_TASKS, ["Phase","Task","BaseHours","Tag"], {**TASK_DTYPES, "Tag": pd.CategoricalDtype(PLUMBING_TAGS)}
+)
+
+def plumbing_defaults_df():
+    return _PLUMB_DEFAULT_DF.copy()
+
+_MECH_TASKS = (
+    ("SD","Meetings",12),
+    ("SD","Preliminary load calcs",18),
+    ("SD","Preliminary sizing/routing",15),
+    ("SD","SD Narrative",8),
+    ("SD","QA/QC",2),
+    ("DD","Meetings",20),
+    ("DD","Load calcs",20),
+    ("DD","Coordination",10),
+    ("DD","Equipment selection",15),
+    ("DD","Details/Schedules",10),
+    ("DD","Chase/Shaft/BOH routing",15),
+    ("DD","Unit modeling",60),
+    ("DD","Amenity space modeling",40),
+    ("DD","QA/QC",8),
+    ("CD","Meetings",16),
+    ("CD","Coordination",10),
+    ("CD","Equipment selection",10),
+    ("CD","Details/Schedules",10),
+    ("CD","BOH routing/detailing",20),
+    ("CD","Unit modeling/detailing",40),
+    ("CD","Amenity space modeling",20),
+    ("CD","QA/QC",8),
+    ("Bidding","Meetings",25),
+    ("Bidding","Coordination",10),
+    ("Bidding","RFI/Submittals",20),
+    ("CA","CA Support (submittals/RFIs/site)",60),
+)
+_MECH_DEFAULT_DF = _build_defaults(_MECH_TASKS, ["Phase","Task","BaseHours"])
+
+def mechanical_defaults_df():
+    return _MECH_DEFAULT_DF.copy()
+
+PLUMB_LIB_COLS = ["Phase", "Task", "BaseHours", "Tag", "Enabled"]
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _plumbing_cached(lib_key: tuple, podium: bool, lux_units: int, typ_units: int, dom_units: int) -> pd.DataFrame:
+    df = pd.DataFrame(list(lib_key), columns=PLUMB_LIB_COLS)
+    df = df.loc[df["Enabled"].astype(bool).to_numpy()]
+    if df.empty:
+        return pd.DataFrame([{"Phase":"SD","Task":"No plumbing tasks enabled","BaseHours":1.0,"Enabled":True}])
+
+    base = pd.to_numeric(df["BaseHours"], errors="coerce").fillna(0.0)
+    tag = df["Tag"].fillna("").astype(str).str.strip()
+
+    # Unit-driven tasks scale by their unit count; everything else keeps its base hours
+    mult = tag.map({
+        "lux_units_4hr": float(lux_units),
+        "typ_units_4hr": float(typ_units),
+        "dom_units_2hr": float(dom_units),
+    }).fillna(1.0)
+    out = df.assign(BaseHours=base * mult, Enabled=True)
+    if not podium:
+        out = out.loc[(tag != "podium_only").to_numpy()]
+
+    if out.empty:
+        out = pd.DataFrame([{"Phase":"SD","Task":"No plumbing tasks enabled","BaseHours":1.0,"Enabled":True}])
+    return out[["Phase","Task","BaseHours","Enabled"]].reset_index(drop=True)
+
+def build_plumbing_task_df(lib_df: pd.DataFrame, podium: bool, lux_units: int, typ_units: int, dom_units: int) -> pd.DataFrame:
+    # ---- FIX: make this resilient to older session_state frames missing Tag ----
+    # Fill only the missing columns; the session library itself is never mutated
+    fill = {"Tag": "", "Enabled": True, "BaseHours": 0.0, "Phase": "SD", "Task": ""}
+    missing = {c: v for c, v in fill.items() if c not in lib_df.columns}
+    df = lib_df.assign(**missing) if missing else lib_df
+
+    # Same library + unit inputs reuse the scaled task list across reruns
+    lib_key = tuple(df[PLUMB_LIB_COLS].itertuples(index=False, name=None))
+    return _plumbing_cached(lib_key, bool(podium), int(lux_units), int(typ_units), int(dom_units)).copy()